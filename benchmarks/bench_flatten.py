@@ -0,0 +1,93 @@
+"""
+Benchmark for `RequirementFile.to_single_file`. Builds a tree of generated requirement files
+and reports flatten throughput in MB/s of output written.
+
+Usage:
+    python benchmarks/bench_flatten.py [--lines 50000] [--files 10] [--repeat 5]
+"""
+
+# Built In
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# Run against this checkout even if the package isn't installed.
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+
+# 3rd Party
+from requirement_walker import RequirementFile # pylint: disable=wrong-import-position
+
+# Owned
+
+# Mix of line types found in real requirement files.
+LINE_TEMPLATES = (
+    "package-{i}=={i}.0.1",
+    "package-{i}>=1.0,<{i}.0 # pinned below {i}",
+    "pkg{i} @ git+ssh://git@github.com/ORG/pkg{i}.git@5e2b6d14f00ffbd473dfe8b8602b79e37266568c # git link", # pylint: disable=line-too-long
+    "# A comment about the next {i} requirements",
+    "",
+)
+
+
+def make_tree(directory: Path, lines: int, files: int) -> Path:
+    """ Write `files` child requirement files with `lines` lines in total and a root file. """
+    lines_per_file = lines // files
+    root = directory / 'requirements.txt'
+    with open(root, 'w') as root_file:
+        for file_num in range(files):
+            child = directory / f'reqs_{file_num}.txt'
+            with open(child, 'w') as child_file:
+                for line_num in range(lines_per_file):
+                    i = file_num * lines_per_file + line_num
+                    template = LINE_TEMPLATES[i % len(LINE_TEMPLATES)]
+                    child_file.write(template.format(i=i) + '\n')
+            root_file.write(f'-r ./{child.name}\n')
+    return root
+
+
+def timed(func) -> float:
+    """ Returns how long, in seconds, `func` took to run. """
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def parse(req_file: RequirementFile) -> None:
+    """ Parse every file so flattening only reads from memory. """
+    for entry in req_file.entries:
+        _ = entry.requirement_file.entries
+
+
+def report(label: str, output: Path, seconds: float) -> None:
+    """ Print the throughput of a flatten. """
+    megabytes = output.stat().st_size / 1_000_000
+    print(f"{label:<24} {megabytes:8.2f} MB {seconds:8.3f} s {megabytes / seconds:8.2f} MB/s")
+
+
+def main():
+    """ Run the benchmark and print the results. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=50_000, help='Total lines to generate.')
+    parser.add_argument('--files', type=int, default=10, help='Child requirement files.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs of the cached flatten, the best is reported.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        root = make_tree(directory, args.lines, args.files)
+        output = directory / 'flat.txt'
+
+        req_file = RequirementFile(root)
+        parse_seconds = timed(lambda: parse(req_file))
+        print(f"{'parse':<24} {args.lines:8d} lines {parse_seconds:5.3f} s")
+        # First flatten renders every entry, later ones reuse the cached strings.
+        report('flatten', output, timed(lambda: req_file.to_single_file(output)))
+        best = min(timed(lambda: req_file.to_single_file(output)) for _ in range(args.repeat))
+        report('flatten (cached render)', output, best)
+
+
+if __name__ == '__main__':
+    main()
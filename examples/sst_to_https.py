@@ -10,7 +10,7 @@ from functools import lru_cache
 from shutil import which
 
 # 3rd Party
-from requirement_walker import walk
+from requirement_walker import Entry, RequirementFile
 
 # Owned
 
@@ -40,6 +40,23 @@ def has_ssh(ssh_domain: str) -> bool:
         return False
     return True
 
+def ssh_to_https(entry: Entry) -> None:
+    """
+    Transform for `RequirementFile.transform`. If the requirement is an SSH requirement to a domain
+    this terminal does not have access to, then the requirement is changed to HTTPs.
+    """
+    if entry.requirement and entry.requirement.url:
+        ssh_domain = EXTRACT_SSH_DOMAIN.search(entry.requirement.url)
+        if ssh_domain and not has_ssh(ssh_domain.group(1)):
+            new_url = MATCH_SSH.sub('https://', entry.requirement.url)
+            LOGGER.info(
+                "No access to domain %s:\n"
+                "       Swapping:\n"
+                "           - %s\n"
+                "       For:\n"
+                "           - %s\n", ssh_domain.group(1), entry.requirement.url, new_url)
+            entry.requirement.url = new_url
+
 def ssh_check_or_https(input_file_path: str, output_file_path: str) -> None:
     """
     Given a path to q requirements file, will look for SSH requirements. If this terminal
@@ -51,21 +68,14 @@ def ssh_check_or_https(input_file_path: str, output_file_path: str) -> None:
         output_file_path (str): Path to output all the requirements to.
     All requirements will be outputted
     """
+    # More transforms can be passed here, they are all applied in a single walk.
+    RequirementFile(input_file_path).to_single_file(output_file_path, transforms=[ssh_to_https])
 
-    entries = []
-    for entry in walk(input_file_path):
-        if entry.requirement.url:
-            ssh_domain = EXTRACT_SSH_DOMAIN.search(entry.requirement.url)
-            if ssh_domain and not has_ssh(ssh_domain.group(1)):
-                new_url = MATCH_SSH.sub('https://', entry.requirement.url)
-                LOGGER.info(
-                    "No access to domain %s:\n"
-                    "       Swapping:\n"
-                    "           - %s\n"
-                    "       For:\n"
-                    "           - %s\n", ssh_domain.group(1), entry.requirement.url, new_url)
-                entry.requirement.url = new_url
-        entries.append(entry)
-
-    with open(output_file_path, 'w') as req_file:
-        req_file.writelines((str(entry) + '\n' for entry in entries))
+def ssh_check_or_https_in_place(input_file_path: str) -> None:
+    """
+    Same as `ssh_check_or_https` but rewrites each requirements file in place instead of
+    outputting to a single file. Only files with changed requirements are rewritten.
+    ARGS:
+        input_file_path (str): Path to the inputted requirements.txt file.
+    """
+    RequirementFile(input_file_path).transform_in_place(ssh_to_https)
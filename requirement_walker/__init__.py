@@ -1,3 +1,35 @@
-""" Module level imports. Moving stuff up. """
-from .walker import Entry, Comment, _ProxyRequirement, RequirementFile
-from .requirment_types import LocalPackageRequirement, FailedRequirement
+"""
+Module level imports. Moving stuff up.
+Imported lazily so the command line client doesn't import `pkg_resources` unless it needs to.
+"""
+
+# Built In
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING: # Lets type checkers and linters see the lazy exports.
+    from .walker import Entry, Comment, _ProxyRequirement, RequirementFile
+    from .requirment_types import LocalPackageRequirement, FailedRequirement
+
+_EXPORTS = {
+    'Entry': '.walker',
+    'Comment': '.walker',
+    '_ProxyRequirement': '.walker',
+    'RequirementFile': '.walker',
+    'LocalPackageRequirement': '.requirment_types',
+    'FailedRequirement': '.requirment_types',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """ Import exports on first use. """
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    """ Include the lazy exports. """
+    return sorted(list(globals()) + __all__)
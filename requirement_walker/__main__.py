@@ -0,0 +1,11 @@
+""" Allows running `python -m requirement_walker`. """
+
+# Built In
+import sys
+
+# 3rd Party
+
+# Owned
+from .cli import main
+
+sys.exit(main())
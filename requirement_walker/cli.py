@@ -0,0 +1,139 @@
+"""
+Command line interface for `requirement-walker`.
+
+Commands are sent to the daemon (see `daemon`) when one is listening on the socket, otherwise
+they are run in this process. Parsing is only imported when it is needed so talking to the
+daemon stays fast.
+"""
+
+# Built In
+import sys
+import logging
+import argparse
+from pathlib import Path
+from typing import List, Union
+
+# 3rd Party
+
+# Owned
+from .client import default_socket_path, send_request
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """ Build the argument parser for every command. """
+    parser = argparse.ArgumentParser(
+        prog='requirement-walker',
+        description='Walk through requirements and comments in requirements.txt files.')
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='Log more. Can be given twice.')
+    parser.add_argument('--socket', default=None,
+                        help='Path to the daemon socket. Defaults to $REQUIREMENT_WALKER_SOCKET '
+                             'or a per user socket.')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help="Don't use the daemon even if it is running.")
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    subparsers.required = True
+
+    flatten = subparsers.add_parser(
+        'flatten', help='Output all requirements to a single file, removing -r flags.')
+    flatten.add_argument('path', help='Path to a requirements.txt file.')
+    flatten.add_argument('-o', '--output', default=None,
+                         help='File to write to. Defaults to stdout.')
+    flatten.add_argument('--no-duplicate-lines', action='store_true',
+                         help='Skip lines which are duplicates of another line.')
+    flatten.add_argument('--no-empty-lines', action='store_true',
+                         help="Skip lines which were empty or just had spaces.")
+    flatten.add_argument('--no-comment-only-lines', action='store_true',
+                         help='Skip lines which were only comments.')
+
+    list_parser = subparsers.add_parser('list', help='List all requirements without comments.')
+    list_parser.add_argument('path', help='Path to a requirements.txt file.')
+
+    query = subparsers.add_parser(
+        'query', help='Output requirements with the given names. Exits with 1 if none match.')
+    query.add_argument('path', help='Path to a requirements.txt file.')
+    query.add_argument('names', nargs='+', metavar='NAME', help='Requirement name.')
+
+    dedup = subparsers.add_parser(
+        'dedup', help='List all requirements, keeping the first requirement with each name.')
+    dedup.add_argument('path', help='Path to a requirements.txt file.')
+
+    daemon = subparsers.add_parser(
+        'daemon', help='Run a daemon which keeps parsed requirement files in memory.')
+    daemon.add_argument('--stop', action='store_true', help='Stop the running daemon.')
+    return parser
+
+
+def _run(request: dict, socket_path: Union[str, None]) -> dict:
+    """ Run the request on the daemon if given a socket and it is reachable, else locally. """
+    if socket_path is not None:
+        try:
+            return send_request(socket_path, request)
+        except PermissionError as err:
+            LOGGER.warning("Not using daemon, running locally: %s", err)
+        except (OSError, ValueError) as err: # Unreachable, timed out or a malformed reply.
+            LOGGER.debug("Daemon unavailable, running locally: %s", err)
+    from .commands import run_command # pylint: disable=import-outside-toplevel
+    return run_command(request)
+
+
+def _daemon(args: argparse.Namespace, socket_path: str) -> int:
+    """ Start or stop the daemon. """
+    if args.stop:
+        try:
+            send_request(socket_path, {'command': 'shutdown'})
+        except (OSError, ValueError):
+            print(f"requirement-walker: no daemon listening on {socket_path}", file=sys.stderr)
+            return 1
+        return 0
+    from .daemon import serve # pylint: disable=import-outside-toplevel
+    print(f"Listening on {socket_path}", file=sys.stderr)
+    try:
+        serve(socket_path)
+    except RuntimeError as err:
+        print(f"requirement-walker: {err}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv: Union[List[str], None] = None) -> int:
+    """
+    Entry point for the `requirement-walker` command. Returns the exit status.
+    ARGS:
+        argv (List[str]): Arguments, defaults to `sys.argv[1:]`.
+    """
+    args = _build_parser().parse_args(argv)
+    logging.basicConfig(
+        format='[%(asctime)s] %(levelname)s - %(message)s',
+        level={0: logging.WARNING, 1: logging.INFO}.get(args.verbose, logging.DEBUG),
+    )
+    try:
+        socket_path = args.socket or default_socket_path()
+    except PermissionError as err:
+        if args.command == 'daemon':
+            print(f"requirement-walker: {err}", file=sys.stderr)
+            return 1
+        LOGGER.warning("Not using daemon, running locally: %s", err)
+        socket_path = None
+    if args.command == 'daemon':
+        return _daemon(args, socket_path)
+
+    request = {key: val for key, val in vars(args).items()
+               if key not in ('verbose', 'socket', 'no_daemon', 'output')}
+    # The daemon may be running in another directory.
+    request['path'] = str(Path(args.path).absolute())
+    response = _run(request, None if args.no_daemon else socket_path)
+
+    sys.stderr.write(response['errors'])
+    if getattr(args, 'output', None):
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w') as output_file:
+            output_file.write(response['output'])
+    else:
+        sys.stdout.write(response['output'])
+    return response['status']
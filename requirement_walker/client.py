@@ -0,0 +1,94 @@
+"""
+Client side of the daemon. Kept separate from `daemon` so talking to the daemon doesn't
+import `pkg_resources` or parse anything.
+"""
+
+# Built In
+import os
+import json
+import stat
+import socket
+import tempfile
+from typing import Union
+
+# 3rd Party
+
+# Owned
+
+# Environment variable which can hold the path to the daemon's socket.
+SOCKET_ENV_VAR = 'REQUIREMENT_WALKER_SOCKET'
+
+# Seconds to wait on the daemon before giving up on it.
+DAEMON_TIMEOUT = 30
+
+
+def default_socket_path() -> str:
+    """
+    Path to the daemon's socket. Uses `REQUIREMENT_WALKER_SOCKET` if set, otherwise a socket in
+    `XDG_RUNTIME_DIR` or, without that, in a private per user directory in the temp directory.
+    Raises `PermissionError` if that directory belongs to another user or others can access it.
+    """
+    if os.environ.get(SOCKET_ENV_VAR):
+        return os.environ[SOCKET_ENV_VAR]
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'requirement-walker.sock')
+    directory = os.path.join(tempfile.gettempdir(), f'requirement-walker-{os.getuid()}')
+    _private_directory(directory)
+    return os.path.join(directory, 'daemon.sock')
+
+
+def _private_directory(directory: str) -> None:
+    """
+    Create `directory` so only this user can access it. If it already exists, check that it
+    is a directory owned by this user which nobody else can access.
+    """
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    dir_stat = os.lstat(directory)
+    if not stat.S_ISDIR(dir_stat.st_mode) or dir_stat.st_uid != os.getuid() \
+            or dir_stat.st_mode & 0o077:
+        raise PermissionError(
+            f"{directory} must be a directory owned by and only accessible to this user")
+
+
+def check_socket_owner(socket_path: str) -> None:
+    """
+    Raises `PermissionError` if the socket is not owned by this user, so we never send requests
+    to (or trust output from) a daemon someone else started.
+    """
+    if os.stat(socket_path).st_uid != os.getuid():
+        raise PermissionError(f"{socket_path} is not owned by this user")
+
+
+def is_running(socket_path: str) -> bool:
+    """ True if something is accepting connections at `socket_path`. """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def send_request(socket_path: str, request: dict, timeout: Union[float, None] = None) -> dict:
+    """
+    Send a request to the daemon and return its response. Gives up after `timeout` seconds,
+    defaulting to `DAEMON_TIMEOUT`.
+    Raises `PermissionError` if the socket belongs to another user, `OSError` if the daemon
+    can't be reached or times out and `ValueError` if its response is malformed.
+    """
+    check_socket_owner(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(DAEMON_TIMEOUT if timeout is None else timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        with sock.makefile('rb') as response_file:
+            line = response_file.readline()
+    if not line:
+        raise ConnectionError(f"No response from daemon at {socket_path}")
+    response = json.loads(line)
+    if not isinstance(response, dict) or not {'output', 'errors', 'status'} <= response.keys():
+        raise ValueError(f"Malformed response from daemon at {socket_path}: {line!r}")
+    return response
@@ -0,0 +1,131 @@
+"""
+Commands shared by the command line interface and the daemon.
+
+A command takes a request (a dict which must be JSON serializable) and returns a response dict:
+{
+    "output": "Text to write to stdout (or the output file)",
+    "errors": "Text to write to stderr",
+    "status": 0 # Exit status
+}
+"""
+
+# Built In
+import re
+from typing import Callable, Iterable, List
+
+# 3rd Party
+
+# Owned
+from .walker import RequirementFile
+from .requirment_types import LocalPackageRequirement, FailedRequirement
+
+# Used to normalize requirement names so `My_Package` and `my-package` match (PEP 503).
+NAME_SEPARATORS = re.compile(r"[-_.]+")
+
+Loader = Callable[[str], RequirementFile]
+
+
+def canonical_name(name: str) -> str:
+    """ Normalize a requirement name for comparison. """
+    return NAME_SEPARATORS.sub('-', name).lower()
+
+
+def _response(output_lines: Iterable[str] = (),
+              error_lines: Iterable[str] = (),
+              status: int = 0) -> dict:
+    """ Build a response dict from lines of output and errors. """
+    output = ''.join(line + '\n' for line in output_lines)
+    errors = ''.join(line + '\n' for line in error_lines)
+    return {'output': output, 'errors': errors, 'status': status}
+
+
+def error_response(message: str) -> dict:
+    """ Response for a request which could not be run. """
+    return _response(error_lines=[f"requirement-walker: error: {message}"], status=2)
+
+
+def _dedup_key(entry) -> str:
+    """
+    Key used to find duplicate requirements. Local and failed requirements have default names
+    so they are compared by what would be written out instead.
+    """
+    if isinstance(entry.requirement, (LocalPackageRequirement, FailedRequirement)):
+        return str(entry.proxy_requirement)
+    return canonical_name(entry.requirement.name)
+
+
+def flatten(req_file: RequirementFile, request: dict) -> dict:
+    """ All entries, recursively, the same as `RequirementFile.to_single_file` would write. """
+    return _response(req_file.iter_lines(
+        no_duplicate_lines=request.get('no_duplicate_lines', False),
+        no_empty_lines=request.get('no_empty_lines', False),
+        no_comment_only_lines=request.get('no_comment_only_lines', False),
+    ))
+
+
+def list_requirements(req_file: RequirementFile, _: dict) -> dict:
+    """ All requirements, recursively, without comments. """
+    return _response(
+        str(entry.proxy_requirement)
+        for entry in req_file.iter_recursive() if entry.requirement
+    )
+
+
+def query(req_file: RequirementFile, request: dict) -> dict:
+    """
+    Every requirement entry whose name matches one of the requested names.
+    Status is 1 if nothing matched.
+    """
+    names = {canonical_name(name) for name in request['names']}
+    matches = [
+        str(entry) for entry in req_file.iter_recursive()
+        if entry.requirement and canonical_name(entry.requirement.name) in names
+    ]
+    return _response(matches, status=0 if matches else 1)
+
+
+def dedup(req_file: RequirementFile, _: dict) -> dict:
+    """
+    All requirements, recursively, keeping only the first requirement with each name.
+    Dropped requirements which differ from the one kept are reported as errors.
+    """
+    kept = {}
+    errors: List[str] = []
+    for entry in req_file.iter_recursive():
+        if not entry.requirement:
+            continue
+        key = _dedup_key(entry)
+        requirement_str = str(entry.proxy_requirement)
+        if key not in kept:
+            kept[key] = requirement_str
+        elif kept[key] != requirement_str:
+            errors.append(
+                f"Conflicting requirements for {key}: kept '{kept[key]}', "
+                f"dropped '{requirement_str}'"
+            )
+    return _response(kept.values(), errors)
+
+
+COMMANDS = {
+    'flatten': flatten,
+    'list': list_requirements,
+    'query': query,
+    'dedup': dedup,
+}
+
+
+def run_command(request: dict, load: Loader = RequirementFile) -> dict:
+    """
+    Run a command.
+    ARGS:
+        request (dict): Must have `command` (a key of `COMMANDS`) and `path` (path to the
+            requirements file) plus any options for that command.
+        load (Callable): Given the path, returns the `RequirementFile` to run the command on.
+    """
+    command = COMMANDS.get(request.get('command'))
+    if command is None:
+        return error_response(f"unknown command {request.get('command')!r}")
+    try:
+        return command(load(request['path']), request)
+    except OSError as err:
+        return error_response(str(err))
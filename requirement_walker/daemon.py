@@ -0,0 +1,161 @@
+"""
+A local daemon which keeps parsed requirement files in memory so repeated commands don't have
+to reparse them. Clients send one JSON request per line over a Unix socket and get one JSON
+response per line back (see `commands`). Cached files are reparsed whenever the modification
+time or size of any file in the tree changes.
+"""
+
+# Built In
+import os
+import json
+import logging
+import socketserver
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+# 3rd Party
+
+# Owned
+from .walker import RequirementFile
+from .commands import run_command, error_response
+from .client import is_running
+
+LOGGER = logging.getLogger(__name__)
+
+# Seconds a client has to send its request before its connection is dropped.
+REQUEST_TIMEOUT = 10
+
+Stamps = Dict[Path, Tuple[int, int]]
+
+
+def _stamp(path: Path) -> Tuple[int, int]:
+    """ Modification time and size of a file. """
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+class RequirementFileCache: # pylint: disable=too-few-public-methods
+    """
+    Cache of fully parsed requirement files keyed by their resolved path. Used as the `load`
+    argument of `commands.run_command`. Safe to use from several threads, a file is only
+    parsed by one thread at a time and parsing one file doesn't block loading another.
+    """
+    def __init__(self):
+        """ Constructor """
+        self._cache: Dict[Path, Tuple[RequirementFile, Stamps]] = {}
+        self._locks: Dict[Path, threading.Lock] = {}
+        self._locks_lock = threading.Lock() # Guards `_locks`.
+
+    def __call__(self, path: str) -> RequirementFile:
+        """
+        Returns the parsed requirement file at `path`, reparsing it if any file in its
+        tree has changed since it was cached.
+        """
+        resolved = Path(path).resolve()
+        with self._locks_lock:
+            lock = self._locks.setdefault(resolved, threading.Lock())
+        with lock:
+            cached = self._cache.get(resolved)
+            if cached is not None and self._is_current(cached[1]):
+                LOGGER.debug("Using cached requirement file: %s", resolved)
+                return cached[0]
+            LOGGER.info("Parsing requirement file: %s", resolved)
+            req_file = RequirementFile(resolved)
+            stamps = {}
+            self._parse(req_file, stamps)
+            self._cache[resolved] = (req_file, stamps)
+            return req_file
+
+    @staticmethod
+    def _is_current(stamps: Stamps) -> bool:
+        """ True if none of the files have changed since they were stamped. """
+        try:
+            return all(_stamp(path) == stamp for path, stamp in stamps.items())
+        except OSError:
+            return False
+
+    def _parse(self, req_file: RequirementFile, stamps: Stamps) -> None:
+        """
+        Parse every entry of `req_file` and of every requirement file it references so
+        later walks only read from memory. Files are stamped before they are read so a change
+        made while parsing is picked up on the next call.
+        """
+        stamps[req_file.requirement_file_path.resolve()] = _stamp(req_file.requirement_file_path)
+        for entry in req_file.entries:
+            if isinstance(entry.requirement_file, RequirementFile):
+                self._parse(entry.requirement_file, stamps)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """ Handles one connection: reads one JSON request and writes one JSON response. """
+
+    timeout = REQUEST_TIMEOUT
+
+    def handle(self):
+        """ Run the request against the server's cache. Always replies, even on errors. """
+        try:
+            line = self.rfile.readline()
+        except OSError as err: # Includes timing out.
+            LOGGER.warning("Dropping connection, no request received: %s", err)
+            return
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            LOGGER.error("Invalid request: %r", line)
+            response = error_response(f"invalid request {line!r}")
+        elif request.get('command') == 'shutdown':
+            response = {'output': '', 'errors': '', 'status': 0}
+            # `shutdown` waits for `serve_forever` to return so it can't run on this thread.
+            threading.Thread(target=self.server.shutdown).start()
+        else:
+            try:
+                response = run_command(request, self.server.cache)
+            except Exception as err: # pylint: disable=broad-except
+                LOGGER.exception("Request failed: %r", request)
+                response = error_response(f"{type(err).__name__}: {err}")
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Unix socket server which answers requests from a `RequirementFileCache`. Each connection
+    is handled on its own thread so a slow client or parse doesn't hold up the others.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        """
+        Constructor. Removes a stale socket file left behind by a daemon which is
+        no longer running.
+        ARGS:
+            socket_path (str): Path to create the Unix socket at.
+        """
+        self.cache = RequirementFileCache()
+        if os.path.exists(socket_path):
+            if is_running(socket_path):
+                raise RuntimeError(f"A daemon is already listening on {socket_path}")
+            os.unlink(socket_path)
+        old_umask = os.umask(0o077) # Only this user may connect.
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        """ Close the server and remove the socket file. """
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def serve(socket_path: str) -> None:
+    """ Run the daemon until it is sent a `shutdown` request. """
+    with DaemonServer(socket_path) as server:
+        LOGGER.info("Listening on %s", socket_path)
+        server.serve_forever()
@@ -3,9 +3,14 @@ Package to parse requirements file.
 """
 
 # Built In
+import os
 import logging
+import tempfile
+from contextlib import contextmanager
+from itertools import groupby, islice
+from operator import is_not
 from pathlib import Path
-from typing import Union, Generator, Tuple
+from typing import Union, Generator, Tuple, Callable, Iterable, List, TextIO
 from pkg_resources import Requirement
 
 # 3rd Party
@@ -22,6 +27,34 @@ from .regex_expressions import (
 
 LOGGER = logging.getLogger(__name__)
 
+# Number of lines `to_single_file` joins into each write.
+WRITE_CHUNK_LINES = 4096
+
+@contextmanager
+def _replace_on_success(path: Path,
+                        newline: Union[str, None] = None) -> Generator[TextIO, None, None]:
+    """
+    Yields a temporary file, in the same directory as `path`, to write to. Once the block
+    finishes the temporary file replaces `path`. If the block raises, `path` is left untouched.
+    Lets a file be written while it is still being read (e.g. flattening a file onto itself).
+    """
+    if path.exists():
+        mode = path.stat().st_mode & 0o777
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    with tempfile.NamedTemporaryFile('w', dir=path.parent, prefix=f'.{path.name}.',
+                                     suffix='.tmp', newline=newline, delete=False) as temp_file:
+        try:
+            yield temp_file
+        except BaseException:
+            temp_file.close()
+            os.unlink(temp_file.name)
+            raise
+    os.chmod(temp_file.name, mode)
+    os.replace(temp_file.name, path)
+
 class RequirementFileError(Exception):
     """
     An exception raised when we try to parse a requirement which is
@@ -173,7 +206,7 @@ class _ProxyRequirement: # pylint: disable=too-few-public-methods
             return self.requirement.url
         return str(self.requirement) # Fall back to the string representation of a Requirement
 
-class Entry: # pylint: disable=too-few-public-methods
+class Entry: # pylint: disable=too-few-public-methods,too-many-instance-attributes
     """
     We define an `Entry` as a line within the requirement file.
     An entry can be a:
@@ -186,38 +219,68 @@ class Entry: # pylint: disable=too-few-public-methods
     Ideally, if you iterate over each entry and add each one to a file you will
     end with all your requirements in a single file with the same formatting they were pulled as.
     """
-    def __init__(self,
+    def __init__(self, # pylint: disable=too-many-arguments
                  *_, # Not going to allow positional arguments.
                  proxy_requirement: Union['_ProxyRequirement', None] = None,
                  comment: ['Comment', None] = None,
-                 requirement_file: Union['RequirementFile', None] = None):
+                 requirement_file: Union['RequirementFile', None] = None,
+                 line: Union[str, None] = None,
+                 line_number: Union[int, None] = None,
+                 line_ending: str = '\n'):
+        """
+        Constructor
+        ARGS:
+            proxy_requirement (_ProxyRequirement): The requirement on this line, if any.
+            comment (Comment): The comment on this line, if any.
+            requirement_file (RequirementFile): The `-r` requirement file on this line, if any.
+            line (str): The line, as read from the file (without the newline), that this
+                entry was parsed from. `None` if the entry was not parsed from a file.
+            line_number (int): The 1-based line number `line` was found on.
+            line_ending (str): What ended `line` in the file: '\r\n', '\n' or '' if it was the
+                last line and had no newline.
+        """
         self.proxy_requirement = proxy_requirement if proxy_requirement else None
         self.requirement = proxy_requirement.requirement if proxy_requirement else None
         self.comment = comment if comment else None
         self.requirement_file = requirement_file
+        self.line = line
+        self.line_number = line_number
+        self.line_ending = line_ending
+        self._original_state = self._state()
+        self._line_reusable = line is not None and requirement_file is None and not (
+            self.comment and 'root-relative' in self.comment.arguments)
+        self._rendered = None
+        self._rendered_state = None
 
     def __str__(self):
-        """ String magic method overload to print out an entry as it appeared before. """
+        """
+        String magic method overload to print out an entry as it appeared before.
+        The string is cached until something it depends on is modified.
+        """
+        state = self._state()
+        if self._rendered is None or self._state_changed(state, self._rendered_state):
+            self._rendered = self._render(state)
+            self._rendered_state = state
+        return self._rendered
+
+    def _render(self, state: tuple) -> str:
+        """
+        Build the string for `__str__`. An unmodified entry which was parsed from a line
+        reuses that line unless the line can't be used as is (`-r` or `root-relative`).
+        """
+        if self._line_reusable and not self._state_changed(state, self._original_state):
+            return self.line.strip()
         root_relative = self.comment.arguments.get('root-relative', None) if self.comment else None
-        # pylint: disable=line-too-long
-        str_map = {
-            # proxy_requirement, comment, requirement_file
-            (False, False, False): '', # Was just an empty line
-            (True, False, False): f"{self.proxy_requirement}",
-            (False, True, False):  f"{self.comment}",
-            (False, False, True): f"-r {root_relative}" if root_relative else f"-r {self.requirement_file}",
-            (True, True, False): f"{self.proxy_requirement} {self.comment}",
-            (False, True, True): f"-r {root_relative} {self.comment}" if root_relative else f"-r {self.requirement_file} {self.comment}",
-        }
-        # pylint: enable=line-too-long
-        key = (bool(self.proxy_requirement), bool(self.comment), bool(self.requirement_file))
-        try:
-            return str_map[key]
-        except KeyError:
-            LOGGER.exception(
-                "Exception occured. Unknown pattern of arguments passed to Entry object.Continueing"
-            )
-            return ''
+        has_requirement, has_comment = bool(self.proxy_requirement), bool(self.comment)
+        if self.requirement_file:
+            if has_requirement:
+                LOGGER.error(
+                    "Unknown pattern of arguments passed to Entry object. Continuing")
+                return ''
+            line = f"-r {root_relative}" if root_relative else f"-r {self.requirement_file}"
+            return f"{line} {self.comment}" if has_comment else line
+        # Empty string if it was just an empty line.
+        return ' '.join(str(part) for part in (self.proxy_requirement, self.comment) if part)
 
     def __bool__(self):
         """
@@ -229,6 +292,43 @@ class Entry: # pylint: disable=too-few-public-methods
                 return True
         return False
 
+    def _state(self) -> tuple:
+        """
+        Returns a snapshot of everything `__str__` reads. Used to tell if an entry was modified.
+        """
+        # Called for every `str()` so avoid anything slower than attribute access.
+        proxy_requirement, comment = self.proxy_requirement, self.comment
+        requirement_file = self.requirement_file
+        requirement = getattr(proxy_requirement, 'requirement', None)
+        if requirement is None:
+            requirement_state = (None, None, None, None, None)
+        else:
+            requirement_state = (requirement.name, requirement.url, requirement.extras,
+                                 requirement.specifier, requirement.marker)
+        return (
+            proxy_requirement,
+            requirement,
+            *requirement_state,
+            comment,
+            comment.comment if comment is not None else None,
+            comment.arguments.get('root-relative') if comment is not None else None,
+            requirement_file,
+            requirement_file.requirement_file_path if requirement_file is not None else None,
+        )
+
+    @staticmethod
+    def _state_changed(state: tuple, other_state: tuple) -> bool:
+        """ Returns True if anything in the two snapshots from `_state` is not the same object. """
+        return any(map(is_not, state, other_state))
+
+    def is_modified(self) -> bool:
+        """
+        Returns True if anything which changes how this entry is written out (the requirement,
+        its url, specifier, extras, marker, the comment or the requirement file) was changed
+        or replaced since the entry was created.
+        """
+        return self._state_changed(self._state(), self._original_state)
+
     def is_git(self, return_protocol: bool = False) -> Union[bool, Tuple[bool, str]]:
         """
         Returns true if the requirement for this entry is a requirement to a git URL.
@@ -270,11 +370,12 @@ class RequirementFile:
             self._entries = list(self)
         return self._entries
 
-    def to_single_file(self,
+    def to_single_file(self, # pylint: disable=too-many-arguments
                        path: str,
                        no_duplicate_lines: bool = False,
                        no_empty_lines: bool = False,
-                       no_comment_only_lines: bool = False) -> None:
+                       no_comment_only_lines: bool = False,
+                       transforms: Iterable[Callable[[Entry], None]] = ()) -> None:
         """
         Output all requirements to the provided path. Creates/overwrites the provided file path.
         Good for removing `-r` or `--requirement` flags.
@@ -285,20 +386,158 @@ class RequirementFile:
             no_empty_lines (bool): Don't add lines that were empty or just had spaces.
             no_comment_only_lines (bool): Don't add lines which were only comments with
                                           no requirements.
+            transforms (Iterable[Callable]): Transforms applied, in order, to each entry before
+                                             it is written. See `transform`.
         """
         file_path = Path(path)
         file_path.parent.mkdir(parents=True, exist_ok=True) # Make the directory if it doesn't exist
-        entries_to_write = []
-        for entry in self.iter_recursive():
-            if no_empty_lines and not entry:
-                continue
-            if no_comment_only_lines and entry.is_comment_only():
+        lines = self.iter_lines(no_duplicate_lines=no_duplicate_lines,
+                                no_empty_lines=no_empty_lines,
+                                no_comment_only_lines=no_comment_only_lines,
+                                transforms=transforms)
+        with _replace_on_success(file_path.absolute()) as output_file:
+            # Writing in chunks is much faster than a write per line.
+            chunk = list(islice(lines, WRITE_CHUNK_LINES))
+            while chunk:
+                chunk.append('') # So the last line also ends with a newline.
+                output_file.write('\n'.join(chunk))
+                chunk = list(islice(lines, WRITE_CHUNK_LINES))
+
+    def iter_lines(self, # pylint: disable=too-many-arguments
+                   no_duplicate_lines: bool = False,
+                   no_empty_lines: bool = False,
+                   no_comment_only_lines: bool = False,
+                   transforms: Iterable[Callable[[Entry], None]] = ()
+                   ) -> Generator[str, None, None]:
+        """
+        Yields the lines (without newlines) `to_single_file` would write.
+        Arguments are the same as `to_single_file`.
+        """
+        seen_lines = set()
+        for entry in self.transform(*transforms,
+                                    no_empty_lines=no_empty_lines,
+                                    no_comment_only_lines=no_comment_only_lines):
+            line = str(entry)
+            if no_duplicate_lines:
+                if line in seen_lines:
+                    continue
+                seen_lines.add(line)
+            yield line
+
+    def transform(self,
+                  *transforms: Callable[[Entry], None],
+                  no_empty_lines: bool = False,
+                  no_comment_only_lines: bool = False) -> Generator[Entry, None, None]:
+        """
+        Walks all requirements (see `iter_recursive`) once, applying every transform to each
+        entry before yielding it. A transform is any callable which accepts an `Entry` and
+        modifies it in place, for example by changing `entry.requirement.url`. Its return value
+        is ignored. Use `Entry.is_modified` to tell which entries were changed.
+        ARGS:
+            transforms (Callable): Transforms to apply, in the order they are given.
+            no_empty_lines (bool): Don't return lines that were empty or just had spaces.
+            no_comment_only_lines (bool): Don't return lines which were only comments with
+                                          no requirements.
+        """
+        for entry in self.iter_recursive(no_empty_lines=no_empty_lines,
+                                         no_comment_only_lines=no_comment_only_lines):
+            for transform in transforms:
+                transform(entry)
+            yield entry
+
+    def transform_in_place(self, *transforms: Callable[[Entry], None]) -> List[Path]:
+        """
+        Applies every transform (see `transform`) to the entries of this requirement file and
+        of every requirement file it references, then writes each file back to its original
+        path. Lines whose entries were not modified are written exactly as they were read,
+        including their line endings, and files with no modified entries are not written at
+        all. A file referenced more than once is only transformed once. Modified `-r` lines
+        keep their paths relative to the file they are in and modified entries with a
+        `root-relative` argument keep the path written in the file, not the `root-relative` one.
+        ARGS:
+            transforms (Callable): Transforms to apply, in the order they are given.
+        Returns a list of the paths which were rewritten.
+        """
+        written = []
+        self._transform_in_place(transforms, set(), written)
+        return written
+
+    def _transform_in_place(self,
+                            transforms: Tuple[Callable[[Entry], None], ...],
+                            visited: set,
+                            written: List[Path]) -> None:
+        """
+        Recursive helper for `transform_in_place`. `visited` holds the resolved paths of files
+        already handled and `written` collects the paths of files that were rewritten.
+        """
+        file_path = self.requirement_file_path.resolve()
+        if file_path in visited:
+            return
+        visited.add(file_path)
+        # Every line is read before the file is written, so the whole file must be walked.
+        lines, modified = [], False
+        for _, line_entries in groupby(self, key=lambda entry: entry.line_number):
+            line_entries = list(line_entries)
+            first = line_entries[0]
+            # Checked before transforming, a transform may remove the requirement files.
+            is_requirement_file_line = isinstance(first.requirement_file, RequirementFile)
+            for entry in line_entries:
+                if isinstance(entry.requirement_file, RequirementFile):
+                    entry.requirement_file._transform_in_place( # pylint: disable=protected-access
+                        transforms, visited, written)
+                for transform in transforms:
+                    transform(entry)
+            if first.line is None:
+                modified = True
+                lines.extend(str(entry) + entry.line_ending for entry in line_entries)
+            elif any(entry.is_modified() for entry in line_entries):
+                modified = True
+                if is_requirement_file_line:
+                    lines.append(self._requirement_file_line(line_entries) + first.line_ending)
+                else:
+                    lines.append(self._in_place_line(first) + first.line_ending)
+            else:
+                lines.append(first.line + first.line_ending)
+        if not modified:
+            LOGGER.debug("No entries modified, not rewriting: %s", file_path)
+            return
+        LOGGER.info("Rewriting requirements file: %s", file_path)
+        with _replace_on_success(file_path, newline='') as output_file:
+            output_file.writelines(lines)
+        written.append(file_path)
+
+    @staticmethod
+    def _in_place_line(entry: Entry) -> str:
+        """
+        Rebuild a modified line for `transform_in_place`. Entries with a `root-relative`
+        argument keep the requirement as written in this file, `str(entry)` would write the
+        `root-relative` path instead.
+        """
+        if entry.comment and 'root-relative' in entry.comment.arguments \
+                and entry.proxy_requirement:
+            return f"{entry.proxy_requirement.requirement_str} {entry.comment}"
+        return str(entry)
+
+    def _requirement_file_line(self, line_entries: List[Entry]) -> str:
+        """
+        Rebuild a line of `-r` entries for `transform_in_place`. Every `-r` stays on the one line
+        with the option and path it was written with, unless the entry's path was changed, in
+        which case the new path is written relative to this file. Entries whose requirement
+        file was removed are left out, if none are left only the comment is written.
+        """
+        parent = self.requirement_file_path.parent.absolute()
+        req_str = LINE_COMMENT_PATTERN.match(line_entries[0].line.strip()).group('reqs')
+        options = []
+        for entry, result in zip(line_entries, REQ_OPTION_PATTERN.finditer(req_str)):
+            if entry.requirement_file is None:
                 continue
-            entries_to_write.append(entry)
-        if no_duplicate_lines:
-            entries_to_write = {str(val): None for val in entries_to_write} # Dict to retain order.
-        with open(file_path.absolute(), 'w') as output_file:
-            print(*entries_to_write, sep='\n', file=output_file)
+            option, original_path = result.group('option'), result.group('file_path')
+            new_path = entry.requirement_file.requirement_file_path
+            if new_path != parent / original_path:
+                option, original_path = '-r ', os.path.relpath(new_path, parent)
+            options.append(f"{option}{original_path}")
+        comment = line_entries[0].comment
+        return ' '.join(options + ([str(comment)] if comment else []))
 
     def __iter__(self) -> Generator[Entry, None, None]:
         """
@@ -312,12 +551,16 @@ class RequirementFile:
             return
 
         LOGGER.info("Iterating requirements file: %s", self.requirement_file_path.absolute())
-        with open(self.requirement_file_path.absolute()) as input_file:
-            for line in input_file:
+        # `newline=''` keeps each line's ending so `transform_in_place` can write it back.
+        with open(self.requirement_file_path.absolute(), newline='') as input_file:
+            for line_number, raw_line in enumerate(input_file, start=1):
+                line_ending = raw_line[len(raw_line.rstrip('\r\n')):]
+                raw_line = raw_line[:len(raw_line) - len(line_ending)]
                 # Strip off the newlines to make things easier
-                line = line.strip()
+                line = raw_line.strip()
                 if not line:
-                    yield Entry() # Empty Line
+                    yield Entry(line=raw_line, line_number=line_number,
+                                line_ending=line_ending) # Empty Line
                     continue
 
                 # Check for a comment only line first:
@@ -338,7 +581,8 @@ class RequirementFile:
                 comment = Comment(comment)
                 try:
                     requirement = _ProxyRequirement(req_str, comment.arguments)
-                    yield Entry(proxy_requirement=requirement, comment=comment)
+                    yield Entry(proxy_requirement=requirement, comment=comment,
+                                line=raw_line, line_number=line_number, line_ending=line_ending)
                 except RequirementFileError:
                     LOGGER.debug(
                         "Parsed requirement appears to be -r argument, make entry a req file.")
@@ -354,7 +598,10 @@ class RequirementFile:
                         )
                         yield Entry(
                             requirement_file=RequirementFile(full_relative_path),
-                            comment=comment
+                            comment=comment,
+                            line=raw_line,
+                            line_number=line_number,
+                            line_ending=line_ending
                         )
         return
 
@@ -381,7 +628,10 @@ class RequirementFile:
         """
         for entry in self:
             if isinstance(entry.requirement_file, RequirementFile):
-                yield from entry.requirement_file.iter_recursive()
+                yield from entry.requirement_file.iter_recursive(
+                    no_empty_lines=no_empty_lines,
+                    no_comment_only_lines=no_comment_only_lines,
+                )
             else:
                 if no_empty_lines and not entry:
                     continue
@@ -37,10 +37,15 @@ setup(
         'dev': REQUIRES_TEST,
     },
     include_package_data=True,
+    entry_points={
+        'console_scripts': [
+            'requirement-walker=requirement_walker.cli:main',
+        ],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: BSD License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6'
+    python_requires='>=3.7'
 )
\ No newline at end of file
@@ -1,6 +1,7 @@
 """ Fixtures, Fixtures, and Fixtures """
 
 # Built In
+import shutil
 from pathlib import Path
 
 # 3rd Party
@@ -15,3 +16,10 @@ def examples_path():
     """
     cur_path = Path(__file__).parent.absolute()
     return cur_path / 'examples'
+
+@pytest.fixture
+def example_application(examples_path, tmp_path):
+    """
+    Return the path to a copy of the example application which is safe to modify.
+    """
+    return shutil.copytree(examples_path / 'example_application', tmp_path / 'example_application')
@@ -0,0 +1,196 @@
+""" Testing the command line interface and daemon """
+
+# Built In
+import os
+import json
+import socket
+import threading
+
+# 3rd Party
+import pytest
+from requirement_walker import client, RequirementFile
+from requirement_walker.cli import main
+from requirement_walker.daemon import DaemonServer
+
+# Owned
+
+@pytest.fixture(name='daemon')
+def fixture_daemon(tmp_path):
+    """ Run a daemon in a thread, yielding its server. """
+    server = DaemonServer(str(tmp_path / 'daemon.sock'))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+@pytest.mark.parametrize('flags', [
+    [],
+    ['--no-empty-lines', '--no-comment-only-lines'],
+    ['--no-duplicate-lines'],
+])
+def test_flatten(examples_path, tmp_path, flags):
+    """ Flatten writes exactly what `to_single_file` does with the same flags. """
+    req_path = examples_path / 'example_application' / 'project_requirements.txt'
+    output_path = tmp_path / 'flat.txt'
+    assert main(['--no-daemon', 'flatten', str(req_path), '-o', str(output_path)] + flags) == 0
+    expected_path = tmp_path / 'expected.txt'
+    RequirementFile(req_path).to_single_file(
+        expected_path, **{flag[2:].replace('-', '_'): True for flag in flags})
+    assert output_path.read_bytes() == expected_path.read_bytes()
+
+def test_list_and_dedup(examples_path, capsys):
+    """ List outputs every requirement, dedup only the first with each name. """
+    req_path = str(examples_path / 'example_application' / 'project_requirements.txt')
+    assert main(['--no-daemon', 'list', req_path]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 18
+    assert main(['--no-daemon', 'dedup', req_path]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 10
+
+def test_query(examples_path, capsys):
+    """ Names are matched case insensitively and the exit status tells if anything matched. """
+    req_path = str(examples_path / 'requirements.txt')
+    assert main(['--no-daemon', 'query', req_path, 'BOTO3', 'package_common']) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == 'boto3==1.16.2'
+    assert out[1].startswith('package.common @ git+ssh://')
+    assert main(['--no-daemon', 'query', req_path, 'not-a-package']) == 1
+
+def test_missing_file(tmp_path, capsys):
+    """ A missing requirements file is reported, not raised. """
+    assert main(['--no-daemon', 'list', str(tmp_path / 'missing.txt')]) == 2
+    assert 'No such file or directory' in capsys.readouterr().err
+
+def test_daemon_unavailable_runs_locally(examples_path, tmp_path, capsys):
+    """ If nothing is listening on the socket the command still runs. """
+    req_path = str(examples_path / 'requirements.txt')
+    assert main(['--socket', str(tmp_path / 'nothing.sock'), 'query', req_path, 'attrs']) == 0
+    assert capsys.readouterr().out == 'attrs==20.3.0\n'
+
+def test_daemon_cache(daemon, example_application, capsys):
+    """ The daemon reuses its parsed files until one of them changes. """
+    socket_args = ['--socket', daemon.server_address]
+    req_path = str(example_application / 'project_requirements.txt')
+    assert main(socket_args + ['query', req_path, 'pytest']) == 0
+    assert capsys.readouterr().out == 'pytest==6.1.2\npytest==6.1.2\n'
+    req_file = daemon.cache(req_path)
+    assert main(socket_args + ['query', req_path, 'pytest']) == 0
+    assert daemon.cache(req_path) is req_file
+
+    generic_path = example_application / 'lambdas' / 'generic_reqs.txt'
+    generic_path.write_text(generic_path.read_text().replace('pytest==6.1.2', 'pytest==7.0.0'))
+    stat = generic_path.stat()
+    os.utime(generic_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    capsys.readouterr()
+    assert main(socket_args + ['query', req_path, 'pytest']) == 0
+    assert capsys.readouterr().out == 'pytest==7.0.0\npytest==7.0.0\n'
+    assert daemon.cache(req_path) is not req_file
+
+def test_daemon_flatten_and_dedup(daemon, examples_path, capsys):
+    """ Commands run on the daemon give the same results as running locally. """
+    req_path = str(examples_path / 'example_application' / 'project_requirements.txt')
+    for args in (['flatten', req_path, '--no-empty-lines'], ['dedup', req_path]):
+        assert main(['--no-daemon'] + args) == 0
+        local = capsys.readouterr()
+        assert main(['--socket', daemon.server_address] + args) == 0
+        assert capsys.readouterr() == local
+    assert daemon.cache(req_path) is daemon.cache(req_path)
+
+def test_daemon_stalled_client(daemon, examples_path, capsys):
+    """ A client which connects and never sends a request doesn't block other clients. """
+    req_path = str(examples_path / 'requirements.txt')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+        stalled.connect(daemon.server_address)
+        response = client.send_request(
+            daemon.server_address, {'command': 'query', 'path': req_path, 'names': ['attrs']},
+            timeout=5)
+        assert response['output'] == 'attrs==20.3.0\n'
+    assert main(['--socket', daemon.server_address, 'query', req_path, 'attrs']) == 0
+    assert capsys.readouterr().out == 'attrs==20.3.0\n'
+
+@pytest.mark.parametrize('reply', [None, b'not json\n', b'[1]\n'])
+def test_daemon_bad_reply_runs_locally(monkeypatch, examples_path, tmp_path, capsys, reply):
+    """ A daemon which times out or sends back garbage is treated as unavailable. """
+    monkeypatch.setattr(client, 'DAEMON_TIMEOUT', 0.2)
+    socket_path = str(tmp_path / 'daemon.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(socket_path)
+        server.listen(1)
+
+        def reply_once():
+            connection, _ = server.accept()
+            with connection:
+                connection.makefile('rb').readline()
+                if reply is not None:
+                    connection.sendall(reply)
+                else:
+                    threading.Event().wait(1)
+
+        thread = threading.Thread(target=reply_once)
+        thread.start()
+        req_path = str(examples_path / 'requirements.txt')
+        assert main(['--socket', socket_path, 'query', req_path, 'attrs']) == 0
+        assert capsys.readouterr().out == 'attrs==20.3.0\n'
+        thread.join()
+
+def _raw_request(socket_path, payload: bytes) -> dict:
+    """ Send raw bytes to the daemon and return its decoded response. """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(payload + b'\n')
+        with sock.makefile('rb') as response_file:
+            return json.loads(response_file.readline())
+
+def test_daemon_bad_requests(daemon, examples_path):
+    """ The daemon replies with an error instead of dropping the connection. """
+    for payload in (b'not json', b'[1]', b'{"command": "list"}'):
+        response = _raw_request(daemon.server_address, payload)
+        assert response['status'] == 2
+        assert response['errors'].startswith('requirement-walker: error: ')
+    request = {'command': 'query', 'path': str(examples_path / 'requirements.txt')}
+    response = _raw_request(daemon.server_address, json.dumps(request).encode())
+    assert response['status'] == 2
+    assert 'KeyError' in response['errors']
+
+def test_default_socket_path_private(monkeypatch, tmp_path):
+    """ Without XDG_RUNTIME_DIR the socket goes in a directory only this user can access. """
+    monkeypatch.delenv(client.SOCKET_ENV_VAR, raising=False)
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    monkeypatch.setattr(client.tempfile, 'gettempdir', lambda: str(tmp_path))
+    socket_path = client.default_socket_path()
+    directory = os.path.dirname(socket_path)
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+    os.chmod(directory, 0o777)
+    with pytest.raises(PermissionError):
+        client.default_socket_path()
+
+def test_socket_owner_checked(monkeypatch, examples_path, tmp_path, capsys):
+    """ A socket owned by another user is not used. """
+    socket_path = str(tmp_path / 'daemon.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(socket_path)
+        sock.listen(1)
+        other_uid = os.getuid() + 1
+        monkeypatch.setattr(client.os, 'getuid', lambda: other_uid)
+        with pytest.raises(PermissionError):
+            client.send_request(socket_path, {'command': 'list'})
+        req_path = str(examples_path / 'requirements.txt')
+        assert main(['--socket', socket_path, 'query', req_path, 'attrs']) == 0
+        assert capsys.readouterr().out == 'attrs==20.3.0\n'
+
+def test_daemon_stop(tmp_path):
+    """ `daemon --stop` shuts the daemon down and the socket is removed. """
+    socket_path = str(tmp_path / 'daemon.sock')
+    thread = threading.Thread(target=main, args=(['--socket', socket_path, 'daemon'],))
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        threading.Event().wait(0.05)
+    assert main(['--socket', socket_path, 'daemon', '--stop']) == 0
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert not os.path.exists(socket_path)
+    assert main(['--socket', socket_path, 'daemon', '--stop']) == 1
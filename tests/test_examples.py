@@ -105,3 +105,22 @@ def test_readme_failed_req(examples_path):
         elif isinstance(entry.requirement_file, RequirementFile):
             print("This entry is another requirement file.", entry)
     assert True
+
+def test_entry_str_reuses_line(examples_path):
+    """ Unmodified entries print the line they were read from, modified ones are rebuilt. """
+    entries = list(RequirementFile(examples_path / './requirements.txt'))
+    entry = entries[10]
+    assert str(entry) == entry.line.strip()
+    assert str(entry).startswith('orm @ git+ssh://')
+    assert str(entry) is str(entry) # Cached
+    entry.requirement.url = entry.requirement.url.replace('ssh://git@', 'https://')
+    assert entry.is_modified()
+    assert str(entry).startswith('orm@ git+https://github.com/ORG/orm.git')
+
+def test_entry_str_root_relative(examples_path):
+    """ Entries with `root-relative` print the root relative path, not the line. """
+    r_file = RequirementFile(
+        examples_path / './example_application/lambdas/api_lambda/api_lambda_reqs.txt')
+    entry = list(r_file)[1]
+    assert not entry.is_modified()
+    assert str(entry).startswith('./pip_packages/orm_models # ')
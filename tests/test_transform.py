@@ -0,0 +1,146 @@
+""" Testing the transform pipeline """
+
+# Built In
+
+# 3rd Party
+import pytest
+from requirement_walker import Comment, RequirementFile
+
+# Owned
+
+def https_to_mirror(entry):
+    """ Transform: point every github https requirement at a mirror. """
+    if entry.requirement and entry.requirement.url:
+        entry.requirement.url = entry.requirement.url.replace(
+            'https://github.com', 'https://mirror.example.com')
+
+def ssh_to_https(entry):
+    """ Transform: swap ssh git requirements for https. """
+    if entry.requirement and entry.requirement.url:
+        entry.requirement.url = entry.requirement.url.replace('ssh://git@', 'https://')
+
+def test_transforms_applied_in_order(examples_path):
+    """ All transforms are applied to each entry, in order, in a single walk. """
+    r_file = RequirementFile(examples_path / './example_application/project_requirements.txt')
+    entries = list(r_file.transform(ssh_to_https, https_to_mirror))
+    assert len(entries) == 26
+    urls = [entry.requirement.url for entry in entries if entry.is_git()]
+    assert urls == [
+        'git+https://mirror.example.com/ORG/orm.git@5e2b6d14f00ffbd473dfe8b8602b79e37266568c',
+        'git+https://mirror.example.com/ORG/orm2.git@5e2b6d14f00ffbd473dfe8b8602b79e37266568c',
+        'git+http://github.com/ORG/orm3.git@5e2b6d14f00ffbd473dfe8b8602b79e37266568c',
+    ]
+    assert [entry.is_modified() for entry in entries].count(True) == 2
+
+def test_to_single_file_transforms(examples_path, tmp_path):
+    """ Transforms passed to `to_single_file` show up in the output. """
+    r_file = RequirementFile(examples_path / './example_application/project_requirements.txt')
+    output_file_path = tmp_path / 'output.txt'
+    r_file.to_single_file(output_file_path, no_empty_lines=True, transforms=[ssh_to_https])
+    lines = output_file_path.read_text().splitlines()
+    assert len(lines) == 23
+    assert not [line for line in lines if 'ssh://' in line]
+
+def test_transform_in_place(example_application):
+    """ Only files with modified entries are rewritten and unmodified lines are kept as is. """
+    root_path = example_application / 'project_requirements.txt'
+    generic_path = example_application / 'lambdas' / 'generic_reqs.txt'
+    original_root = root_path.read_bytes()
+    original_generic = generic_path.read_bytes()
+
+    written = RequirementFile(root_path).transform_in_place(ssh_to_https)
+
+    assert written == [root_path.resolve()]
+    assert generic_path.read_bytes() == original_generic
+    # Line endings (CRLF, no newline at the end of the file) are kept.
+    assert root_path.read_bytes() == original_root.replace(
+        b'orm @ git+ssh://git@', b'orm@ git+https://')
+
+def test_transform_in_place_requirement_files(example_application):
+    """ Modified `-r` lines keep their relative paths and stay on one line. """
+    def review_comment(entry):
+        if entry.requirement_file:
+            entry.comment = Comment(' # reviewed')
+
+    root_path = example_application / 'project_requirements.txt'
+    original_root = root_path.read_bytes()
+
+    RequirementFile(root_path).transform_in_place(review_comment)
+
+    assert root_path.read_bytes() == original_root.replace(
+        b'--requirement=./lambdas/api_lambda/api_lambda_reqs.txt # comment',
+        b'--requirement=./lambdas/api_lambda/api_lambda_reqs.txt # reviewed')
+    s3_path = example_application / 'lambdas' / 's3_event_lambda' / 's3_lambda_reqs.txt'
+    assert s3_path.read_bytes().startswith(b'-r ./../generic_reqs.txt # reviewed\r\n')
+
+def test_transform_in_place_root_relative(example_application):
+    """ A modified entry with `root-relative` keeps the path written in its own file. """
+    def new_comment(entry):
+        if entry.requirement:
+            entry.comment = Comment(' # local requirement-walker: '
+                                    'local-package-name|root-relative=./pip_packages/orm_models')
+
+    s3_path = example_application / 'lambdas' / 's3_event_lambda' / 's3_lambda_reqs.txt'
+    original = s3_path.read_bytes()
+
+    RequirementFile(s3_path).transform_in_place(new_comment)
+
+    assert s3_path.read_bytes() == original.replace(
+        b' # requirement-walker', b' # local requirement-walker')
+    assert s3_path.read_bytes().splitlines()[1].startswith(b'./../../pip_packages/orm_models # local')
+
+def test_transform_in_place_remove_requirement_file(example_application):
+    """ Removing one `-r` from a line with several keeps the others. """
+    def drop_api_lambda(entry):
+        if entry.requirement_file and 'api_lambda' in str(entry.requirement_file):
+            entry.requirement_file = None
+
+    root_path = example_application / 'project_requirements.txt'
+    original_root = root_path.read_bytes()
+
+    RequirementFile(root_path).transform_in_place(drop_api_lambda)
+
+    assert root_path.read_bytes() == original_root.replace(
+        b' --requirement=./lambdas/api_lambda/api_lambda_reqs.txt', b'')
+
+def test_flatten_onto_itself(example_application):
+    """ A file can be flattened onto itself, it is only replaced once it has been read. """
+    root_path = example_application / 'project_requirements.txt'
+    expected_path = example_application / 'expected.txt'
+    RequirementFile(root_path).to_single_file(expected_path)
+
+    RequirementFile(root_path).to_single_file(root_path)
+
+    assert root_path.read_bytes() == expected_path.read_bytes()
+    assert len(root_path.read_text().splitlines()) == 26
+    assert sorted(path.name for path in example_application.iterdir() if path.is_file()) == [
+        'expected.txt', 'project_requirements.txt']
+
+def test_flatten_error_leaves_output(examples_path, tmp_path):
+    """ If flattening fails the output file is left as it was. """
+    def fail(_):
+        raise RuntimeError("Transform failed")
+
+    output_path = tmp_path / 'output.txt'
+    output_path.write_text('untouched\n')
+    r_file = RequirementFile(examples_path / './example_application/project_requirements.txt')
+    with pytest.raises(RuntimeError):
+        r_file.to_single_file(output_path, transforms=[fail])
+    assert output_path.read_text() == 'untouched\n'
+    assert [path.name for path in tmp_path.iterdir()] == ['output.txt']
+
+def test_transform_in_place_visits_files_once(example_application):
+    """ A requirement file referenced twice is only transformed once. """
+    calls = []
+    def bump_pytest(entry):
+        if entry.requirement and entry.requirement.name == 'pytest':
+            calls.append(entry)
+            entry.requirement.specifier = entry.requirement.specifier & '<7'
+
+    written = RequirementFile(
+        example_application / 'project_requirements.txt').transform_in_place(bump_pytest)
+
+    generic_path = example_application / 'lambdas' / 'generic_reqs.txt'
+    assert len(calls) == 1
+    assert written == [generic_path.resolve()]
+    assert 'pytest<7,==6.1.2' in generic_path.read_text().splitlines()